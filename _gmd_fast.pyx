@@ -0,0 +1,198 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional compiled versions of read_table and write_table from gmd_converter, which uses them automatically when the
+module is built. Build in place with ``cythonize -i _gmd_fast.pyx``.
+"""
+from libc.stdint cimport uint16_t, uint32_t, uint64_t
+from libc.string cimport memcpy
+from cpython.bytearray cimport PyByteArray_AS_STRING, PyByteArray_GET_SIZE, PyByteArray_Resize
+from cpython.unicode cimport PyUnicode_DecodeUTF8
+
+# must match gmd_converter
+JSON_NUMBER_PREFIX = "_number: "
+JSON_STRING_PREFIX = "_string: "
+
+
+# values are big endian, assembling them byte by byte is portable and compilers turn it into a byte swap
+cdef inline uint16_t load_u16(const unsigned char* p) noexcept:
+    return (<uint16_t>p[0] << 8) | p[1]
+
+
+cdef inline uint32_t load_u32(const unsigned char* p) noexcept:
+    return (<uint32_t>p[0] << 24) | (<uint32_t>p[1] << 16) | (<uint32_t>p[2] << 8) | p[3]
+
+
+cdef inline double load_double(const unsigned char* p) noexcept:
+    cdef uint64_t bits = (<uint64_t>load_u32(p) << 32) | load_u32(p + 4)
+    cdef double num
+    memcpy(&num, &bits, 8)
+    return num
+
+
+cdef inline void store_u16(unsigned char* p, uint16_t num) noexcept:
+    p[0] = num >> 8
+    p[1] = num
+
+
+cdef inline void store_u32(unsigned char* p, uint32_t num) noexcept:
+    p[0] = num >> 24
+    p[1] = num >> 16
+    p[2] = num >> 8
+    p[3] = num
+
+
+cdef inline void store_double(unsigned char* p, double num) noexcept:
+    cdef uint64_t bits
+    memcpy(&bits, &num, 8)
+    store_u32(p, bits >> 32)
+    store_u32(p + 4, <uint32_t>bits)
+
+
+cdef inline int check_size(Py_ssize_t offset, Py_ssize_t length, Py_ssize_t size) except -1:
+    if offset + length > size:
+        raise Exception("Unexpected end of data")
+    return 0
+
+
+cdef inline unsigned char* grow(bytearray buffer, Py_ssize_t length) except NULL:
+    """Extends the buffer by length bytes and returns a pointer to the new bytes."""
+    cdef Py_ssize_t size = PyByteArray_GET_SIZE(buffer)
+    PyByteArray_Resize(buffer, size + length)
+    return <unsigned char*>PyByteArray_AS_STRING(buffer) + size
+
+
+def read_table(const unsigned char[::1] data, Py_ssize_t offset, bint json_keys=False):
+    cdef Py_ssize_t size = data.shape[0]
+    cdef uint32_t num_pairs
+    cdef unsigned char key_type, value_type, byte
+    cdef uint16_t length
+    cdef dict root, table, child
+    cdef list stack = []
+
+    check_size(offset, 4, size)
+    num_pairs = load_u32(&data[offset])
+    offset += 4
+    root = {}
+    table = root
+    while True:
+        while num_pairs == 0:
+            if not stack:
+                return root, offset
+            table, num_pairs = stack.pop()
+        num_pairs -= 1
+
+        check_size(offset, 1, size)
+        key_type = data[offset]
+        offset += 1
+        if key_type == 0:  # string
+            check_size(offset, 2, size)
+            length = load_u16(&data[offset])
+            offset += 2
+            check_size(offset, length, size)
+            key = PyUnicode_DecodeUTF8(<const char*>&data[offset], length, NULL)
+            offset += length
+            if json_keys:
+                key = JSON_STRING_PREFIX + key
+        elif key_type == 1:  # double
+            check_size(offset, 8, size)
+            key = load_double(&data[offset])
+            offset += 8
+            if json_keys:
+                key = JSON_NUMBER_PREFIX + str(key)
+        else:
+            raise Exception("Invalid key type in table")
+
+        check_size(offset, 1, size)
+        value_type = data[offset]
+        offset += 1
+        if value_type == 0:  # string
+            check_size(offset, 2, size)
+            length = load_u16(&data[offset])
+            offset += 2
+            check_size(offset, length, size)
+            table[key] = PyUnicode_DecodeUTF8(<const char*>&data[offset], length, NULL)
+            offset += length
+        elif value_type == 1:  # double
+            check_size(offset, 8, size)
+            table[key] = load_double(&data[offset])
+            offset += 8
+        elif value_type == 2:  # table
+            check_size(offset, 4, size)
+            child = {}
+            table[key] = child
+            stack.append((table, num_pairs))
+            table = child
+            num_pairs = load_u32(&data[offset])
+            offset += 4
+        elif value_type == 3:  # bool
+            check_size(offset, 1, size)
+            byte = data[offset]
+            if byte > 1:
+                raise Exception("Bool value is neither true or false")
+            table[key] = byte == 1
+            offset += 1
+        else:
+            raise Exception(f"Invalid value type (key {key})")
+
+
+cdef inline int write_tagged_string(bytearray buffer, str string) except -1:
+    cdef bytes encoded = string.encode('utf-8')
+    cdef unsigned char* p
+    if len(encoded) > 0xFFFF:
+        raise Exception(f"String is too long to write ({len(encoded)} bytes)")
+    p = grow(buffer, 3 + len(encoded))
+    p[0] = 0
+    store_u16(p + 1, len(encoded))
+    memcpy(p + 3, <const char*>encoded, len(encoded))
+    return 0
+
+
+cdef inline int write_tagged_double(bytearray buffer, double num) except -1:
+    cdef unsigned char* p = grow(buffer, 9)
+    p[0] = 1
+    store_double(p + 1, num)
+    return 0
+
+
+def write_table(bytearray buffer, dict table, bint json_keys=False):
+    cdef unsigned char* p
+    cdef list stack = []
+
+    store_u32(grow(buffer, 4), len(table))
+    pairs = iter(table.items())
+    while True:
+        for key, value in pairs:
+            if json_keys and type(key) is str:
+                if key.startswith(JSON_STRING_PREFIX):
+                    key = key.removeprefix(JSON_STRING_PREFIX)
+                elif key.startswith(JSON_NUMBER_PREFIX):
+                    key = float(key.removeprefix(JSON_NUMBER_PREFIX))
+
+            if type(key) is str:
+                write_tagged_string(buffer, key)
+            elif type(key) is float:
+                write_tagged_double(buffer, key)
+            else:
+                raise Exception(f"Cannot write table key of type {type(key)}")
+
+            if type(value) is str:
+                write_tagged_string(buffer, value)
+            elif type(value) is float:
+                write_tagged_double(buffer, value)
+            elif type(value) is dict:
+                p = grow(buffer, 5)
+                p[0] = 2
+                store_u32(p + 1, len(value))
+                stack.append(pairs)
+                pairs = iter((<dict>value).items())
+                break
+            elif type(value) is bool:
+                p = grow(buffer, 2)
+                p[0] = 3
+                p[1] = value is True
+            else:
+                raise Exception(f"Cannot write table value of type {type(value)} (Key : {key})")
+        else:
+            if not stack:
+                return
+            pairs = stack.pop()
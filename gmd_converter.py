@@ -1,14 +1,38 @@
+import argparse
+import itertools
+import math
+import mmap
 import os
-import sys
 import struct
 import json
-from typing import BinaryIO
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import _gmd_fast
+except ImportError:
+    _gmd_fast = None
 
 SUPPORTED_VERSIONS = [195]
 """List of supported world versions."""
 # TODO: a lot more versions than this are probably supported, gmd is a newer feature and may not have been changed ever
 
 
+MMAP_MIN_SIZE = 256 * 1024 * 1024
+"""Binaries at least this large are memory mapped rather than read into memory at once."""
+JSON_STREAM_MIN_SIZE = 256 * 1024 * 1024
+"""JSON files at least this large are converted one table at a time if ijson is installed."""
+
+
 JSON_WORLD_VERSION_KEY = "__WORLD_VERSION"
 """Key for the world version in the json format."""
 # keys have type prefixes, so they can always be converted back to the right type, as json only supports string keys
@@ -18,15 +42,35 @@ JSON_STRING_PREFIX = "_string: "
 """Prefix for string keys."""
 
 
+MAX_STRING_LENGTH = 0xFFFF
+"""Maximum length of a string in bytes, as lengths are written as unsigned shorts."""
+
+
+# precompiled formats for the fixed size values, all big endian
+_INT = struct.Struct('!I')
+_SHORT = struct.Struct('!H')
+_DOUBLE = struct.Struct('!d')
+# a number key and number value pair, skipping both type tags
+_DOUBLE_PAIR = struct.Struct('!xdxd')
+# type tags followed by a double, string length or table size, so both can be written at once
+_TAGGED_DOUBLE = struct.Struct('!Bd')
+_TAGGED_SHORT = struct.Struct('!BH')
+_TAGGED_INT = struct.Struct('!BI')
+_TAGGED_TRUE = b'\03\01'
+_TAGGED_FALSE = b'\03\00'
+
+
 type luaTable = dict[str | float, str | float | bool | luaTable]
 
 
 class GlobalModData:
-    def __init__(self, world_version: int):
+    def __init__(self, world_version: int, json_keys: bool = False):
         self.world_version: int = world_version
         """Version of the world."""
         self.tables: dict[str, luaTable] = {}
         """Global mod data tables by their string keys."""
+        self.json_keys: bool = json_keys
+        """Whether table keys (including the table names) have the JSON type prefixes."""
 
 
 def table_keys_to_json(table: luaTable) -> luaTable:
@@ -60,135 +104,314 @@ def table_keys_from_json(table: luaTable) -> luaTable:
     return result
 
 
-def read_int(file: BinaryIO) -> int:
-    return int.from_bytes(file.read(4), 'big', signed=False)
-
-
-def write_int(file: BinaryIO, num: int):
-    file.write(num.to_bytes(4, 'big', signed=False))
-
-
-def read_bool(file: BinaryIO) -> bool:
-    byte = file.read(1)
-    if byte != b'\00' and byte != b'\01':
-        raise Exception("Bool value is neither true or false")
-    return byte != b'\00'
-
-
-def write_bool(file: BinaryIO, value: bool):
-    file.write(b'\01' if value else b'\00')
+def table_has_non_finite(table: luaTable) -> bool:
+    stack = [table]
+    while stack:
+        for value in stack.pop().values():
+            if type(value) is float:
+                if not math.isfinite(value):
+                    return True
+            elif type(value) is dict:
+                stack.append(value)
+    return False
 
 
-def read_double(file: BinaryIO) -> float:
-    [f] = struct.unpack('!d', file.read(8))
-    return f
+def read_int(data: memoryview, offset: int) -> tuple[int, int]:
+    [num] = _INT.unpack_from(data, offset)
+    return num, offset + 4
 
 
-def write_double(file: BinaryIO, num: float):
-    file.write(struct.pack('!d', num))
+def write_int(buffer: bytearray, num: int):
+    buffer += _INT.pack(num)
 
 
-def read_short(file: BinaryIO) -> int:
-    return int.from_bytes(file.read(2), 'big', signed=False)
+def read_short(data: memoryview, offset: int) -> tuple[int, int]:
+    [num] = _SHORT.unpack_from(data, offset)
+    return num, offset + 2
 
 
-def write_short(file: BinaryIO, num: int):
-    file.write(num.to_bytes(2, 'big', signed=False))
+def write_short(buffer: bytearray, num: int):
+    buffer += _SHORT.pack(num)
 
 
-def read_string_utf8(file: BinaryIO, length: int | None = None) -> str:
+def read_string_utf8(data: memoryview, offset: int, length: int | None = None) -> tuple[str, int]:
     if length is None:
-        length = read_short(file)
-    return file.read(length).decode('utf-8')
+        length, offset = read_short(data, offset)
+    return str(data[offset:offset + length], 'utf-8'), offset + length
 
 
-def write_string_utf8(file: BinaryIO, string: str):
-    write_short(file, len(string))
-    file.write(string.encode('utf-8'))
+def write_string_utf8(buffer: bytearray, string: str):
+    # the length is in bytes, not characters
+    encoded = string.encode('utf-8')
+    if len(encoded) > MAX_STRING_LENGTH:
+        raise Exception(f"String is too long to write ({len(encoded)} bytes)")
+    write_short(buffer, len(encoded))
+    buffer += encoded
 
 
-def read_table(file: BinaryIO) -> luaTable:
-    table = {}
-    num_pairs = read_int(file)
-    for i in range(num_pairs):
+def read_double_array(data: memoryview, offset: int, num_pairs: int,
+                      json_keys: bool = False) -> tuple[luaTable, int] | None:
+    """
+    Reads the pairs of a table that only has number keys and number values (e.g. a lua array of numbers) in one go.
+    :param data: The data to read from
+    :param offset: Offset of the first pair
+    :param num_pairs: Number of pairs in the table
+    :param json_keys: Whether to give keys their JSON type prefix
+    :return: the table and the offset after it, or None if the table has any other key or value types
+    """
+    end = offset + num_pairs * _DOUBLE_PAIR.size
+    if end > len(data):
+        return None
+    # every pair is a number tag, 8 bytes, a number tag, 8 bytes so all the tags can be checked with strided slices
+    if (data[offset:end:_DOUBLE_PAIR.size].tobytes().count(1) != num_pairs
+            or data[offset + 9:end:_DOUBLE_PAIR.size].tobytes().count(1) != num_pairs):
+        return None
+
+    pairs = _DOUBLE_PAIR.iter_unpack(data[offset:end])
+    if json_keys:
+        return {JSON_NUMBER_PREFIX + str(key): value for key, value in pairs}, end
+    return dict(pairs), end
+
+
+def read_table(data: memoryview, offset: int, json_keys: bool = False) -> tuple[luaTable, int]:
+    num_pairs, offset = read_int(data, offset)
+    if num_pairs and data[offset] == 1:
+        array = read_double_array(data, offset, num_pairs, json_keys)
+        if array is not None:
+            return array
+    root = {}
+    table = root
+    # parent tables and their remaining pair counts, tables are read iteratively so deep nesting can't overflow
+    stack: list[tuple[luaTable, int]] = []
+    while True:
+        while num_pairs == 0:
+            if not stack:
+                return root, offset
+            table, num_pairs = stack.pop()
+        num_pairs -= 1
+
+        # primitives are read inline rather than through the read_* helpers, this is the hot loop
         key: str | float
-        key_type = int.from_bytes(file.read(1))
+        key_type = data[offset]
+        offset += 1
         match key_type:
             case 0:  # string
-                key = read_string_utf8(file)
+                [length] = _SHORT.unpack_from(data, offset)
+                offset += 2
+                key = str(data[offset:offset + length], 'utf-8')
+                offset += length
+                if json_keys:
+                    key = JSON_STRING_PREFIX + key
             case 1:  # double
-                key = read_double(file)
+                [key] = _DOUBLE.unpack_from(data, offset)
+                offset += 8
+                if json_keys:
+                    key = JSON_NUMBER_PREFIX + str(key)
             case _:
                 raise Exception("Invalid key type in table")
 
-        value_type = int.from_bytes(file.read(1))
+        value_type = data[offset]
+        offset += 1
         match value_type:
             case 0:  # string
-                table[key] = read_string_utf8(file)
+                [length] = _SHORT.unpack_from(data, offset)
+                offset += 2
+                table[key] = str(data[offset:offset + length], 'utf-8')
+                offset += length
             case 1:  # double
-                table[key] = read_double(file)
+                [table[key]] = _DOUBLE.unpack_from(data, offset)
+                offset += 8
             case 2:  # table
-                table[key] = read_table(file)
+                [child_pairs] = _INT.unpack_from(data, offset)
+                offset += 4
+                # only worth trying when the first key is a number
+                if child_pairs and data[offset] == 1:
+                    array = read_double_array(data, offset, child_pairs, json_keys)
+                    if array is not None:
+                        table[key], offset = array
+                        continue
+                child = {}
+                table[key] = child
+                stack.append((table, num_pairs))
+                table = child
+                num_pairs = child_pairs
             case 3:  # bool
-                table[key] = read_bool(file)
+                byte = data[offset]
+                if byte > 1:
+                    raise Exception("Bool value is neither true or false")
+                table[key] = byte == 1
+                offset += 1
             case _:
                 raise Exception(f"Invalid value type (key {key})")
 
-    return table
 
-
-def write_table(file: BinaryIO, table: luaTable):
-    write_int(file, len(table))
-    for key, value in table.items():
-        if type(key) is float:
-            file.write(b'\01')
-            write_double(file, key)
-        elif type(key) is str:
-            file.write(b'\00')
-            write_string_utf8(file, key)
+def write_table(buffer: bytearray, table: luaTable, json_keys: bool = False):
+    write_int(buffer, len(table))
+    pairs = iter(table.items())
+    # pair iterators of the parent tables, tables are written iteratively so deep nesting can't overflow
+    stack = []
+    while True:
+        for key, value in pairs:
+            if json_keys and type(key) is str:
+                if key.startswith(JSON_STRING_PREFIX):
+                    key = key.removeprefix(JSON_STRING_PREFIX)
+                elif key.startswith(JSON_NUMBER_PREFIX):
+                    key = float(key.removeprefix(JSON_NUMBER_PREFIX))
+
+            # primitives are written inline rather than through the write_* helpers, this is the hot loop
+            if type(key) is str:
+                encoded = key.encode('utf-8')
+                if len(encoded) > MAX_STRING_LENGTH:
+                    raise Exception(f"String is too long to write ({len(encoded)} bytes)")
+                buffer += _TAGGED_SHORT.pack(0, len(encoded))
+                buffer += encoded
+            elif type(key) is float:
+                buffer += _TAGGED_DOUBLE.pack(1, key)
+            else:
+                raise Exception(f"Cannot write table key of type {type(key)}")
+
+            if type(value) is str:
+                encoded = value.encode('utf-8')
+                if len(encoded) > MAX_STRING_LENGTH:
+                    raise Exception(f"String is too long to write ({len(encoded)} bytes)")
+                buffer += _TAGGED_SHORT.pack(0, len(encoded))
+                buffer += encoded
+            elif type(value) is float:
+                buffer += _TAGGED_DOUBLE.pack(1, value)
+            elif type(value) is dict:
+                buffer += _TAGGED_INT.pack(2, len(value))
+                stack.append(pairs)
+                pairs = iter(value.items())
+                break
+            elif type(value) is bool:
+                buffer += _TAGGED_TRUE if value else _TAGGED_FALSE
+            else:
+                raise Exception(f"Cannot write table value of type {type(value)} (Key : {key})")
         else:
-            raise Exception(f"Cannot write table key of type {type(key)}")
-
-        if type(value) is str:
-            file.write(b'\00')
-            write_string_utf8(file, value)
-        elif type(value) is float:
-            file.write(b'\01')
-            write_double(file, value)
-        elif type(value) is dict:
-            file.write(b'\02')
-            write_table(file, value)
-        elif type(value) is bool:
-            file.write(b'\03')
-            write_bool(file, value)
-        else:
-            raise Exception(f"Cannot write table value of type {type(value)} (Key : {key})")
+            if not stack:
+                return
+            pairs = stack.pop()
+
+
+# the python versions stay available when the compiled ones replace them, e.g. for comparing the two
+python_read_table = read_table
+python_write_table = write_table
+
+if _gmd_fast is not None:
+    # compiled versions of the table functions, built from _gmd_fast.pyx
+    read_table = _gmd_fast.read_table
+    write_table = _gmd_fast.write_table
 
 
-def from_bin(filepath: str) -> GlobalModData:
+def read_header(data: memoryview, json_keys: bool = False) -> tuple[GlobalModData, int, int]:
     """
-    Creates GlobalModData from a global mod data binary.
-    :param filepath: Filepath of the binary to convert
-    :return: the GlobalModData in the file
+    Reads the start of a global mod data binary.
+    :param data: The binary
+    :param json_keys: Whether the GlobalModData will have JSON type prefixes on its keys
+    :return: the GlobalModData without any tables, the number of entries, and the offset of the first entry
     """
-    file = open(filepath, 'rb')
-
-    world_version = read_int(file)
+    offset = 0
+    world_version, offset = read_int(data, offset)
     if world_version not in SUPPORTED_VERSIONS:
         raise Exception(f"Unsupported world version {world_version}")
-    global_mod_data = GlobalModData(world_version)
+    num_entries, offset = read_int(data, offset)
+    return GlobalModData(world_version, json_keys), num_entries, offset
+
+
+def check_entry_end(name: str, table_end: int, end: int):
+    if table_end != end:
+        raise Exception(f"Table {name} ends at {table_end}, but its entry length says {end}")
 
-    num_entries = read_int(file)
+
+def read_global_mod_data(data: memoryview, json_keys: bool = False) -> GlobalModData:
+    global_mod_data, num_entries, offset = read_header(data, json_keys)
     for i in range(num_entries):
-        length = read_int(file)  # TODO maybe use this for error checking
+        length, offset = read_int(data, offset)
+        end = offset + length
 
-        name = read_string_utf8(file)
-        global_mod_data.tables[name] = read_table(file)
-    file.close()
+        name, offset = read_string_utf8(data, offset)
+        if json_keys:
+            name = JSON_STRING_PREFIX + name
+        global_mod_data.tables[name], offset = read_table(data, offset, json_keys)
+        check_entry_end(name, offset, end)
+
+    return global_mod_data
+
+
+def read_table_from_file(filepath: str, offset: int, json_keys: bool = False) -> tuple[luaTable, int]:
+    with (open(filepath, 'rb') as file,
+          mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+          memoryview(mapped) as data):
+        return read_table(data, offset, json_keys)
+
+
+def read_global_mod_data_parallel(filepath: str, json_keys: bool = False) -> GlobalModData:
+    with (open(filepath, 'rb') as file,
+          mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+          memoryview(mapped) as data):
+        global_mod_data, num_entries, offset = read_header(data, json_keys)
+
+        # the length of each entry lets the tables be found without reading them
+        names = []
+        table_offsets = []
+        ends = []
+        for i in range(num_entries):
+            length, offset = read_int(data, offset)
+            end = offset + length
+
+            name, offset = read_string_utf8(data, offset)
+            if json_keys:
+                name = JSON_STRING_PREFIX + name
+            names.append(name)
+            table_offsets.append(offset)
+            ends.append(end)
+            offset = end
+
+    # each worker maps the file itself, only the finished tables are sent back
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(read_table_from_file, itertools.repeat(filepath), table_offsets,
+                               itertools.repeat(json_keys))
+        for name, (table, table_end), end in zip(names, results, ends):
+            check_entry_end(name, table_end, end)
+            global_mod_data.tables[name] = table
 
     return global_mod_data
 
 
+def from_bin(filepath: str, json_keys: bool = False, parallel: bool = False) -> GlobalModData:
+    """
+    Creates GlobalModData from a global mod data binary.
+    :param filepath: Filepath of the binary to convert
+    :param json_keys: Whether to give keys their JSON type prefixes while reading, for passing straight to to_json
+    :param parallel: Whether to read the tables in parallel processes. The tables have to be pickled back to this
+    process, so this is only faster for large binaries with many tables on machines with several cores, and not at all
+    when _gmd_fast is built
+    :return: the GlobalModData in the file
+    """
+    if parallel:
+        return read_global_mod_data_parallel(filepath, json_keys)
+
+    with open(filepath, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < MMAP_MIN_SIZE:
+            return read_global_mod_data(memoryview(file.read()), json_keys)
+
+        with (mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+              memoryview(mapped) as data):
+            return read_global_mod_data(data, json_keys)
+
+
+def write_entry(buffer: bytearray, table_name: str, table: luaTable, json_keys: bool = False):
+    start = len(buffer)
+    write_int(buffer, 0)  # leaves space to add the size later
+    if json_keys:
+        table_name = table_name.removeprefix(JSON_STRING_PREFIX)
+    write_string_utf8(buffer, table_name)
+
+    write_table(buffer, table, json_keys)
+
+    _INT.pack_into(buffer, start, len(buffer) - start - 4)
+
+
 def to_bin(filepath: str, gmd: GlobalModData):
     """
     Writes GlobalModData as a global mod data binary used by the game.
@@ -196,79 +419,160 @@ def to_bin(filepath: str, gmd: GlobalModData):
     :param gmd: The GlobalModData to write
     :return:
     """
-    file = open(filepath, 'wb')
-    write_int(file, gmd.world_version)
+    buffer = bytearray()
+    write_int(buffer, gmd.world_version)
 
-    write_int(file, len(gmd.tables))  # number of keys
+    write_int(buffer, len(gmd.tables))  # number of keys
     for table_name, table in gmd.tables.items():
-        start = file.tell()
-        write_int(file, 0)  # leaves space to add the size later
-        write_string_utf8(file, table_name)
+        write_entry(buffer, table_name, table, gmd.json_keys)
 
-        write_table(file, table)
+    with open(filepath, 'wb') as file:
+        file.write(buffer)
 
-        end = file.tell()
-        file.seek(start)
-        write_int(file, end - start - 4)
-        file.seek(end)
 
-
-def from_json(filepath: str) -> GlobalModData:
+def from_json(filepath: str, json_keys: bool = False) -> GlobalModData:
     """
     Creates GlobalModData from a JSON file.
     :param filepath: Filepath of a JSON file
+    :param json_keys: Whether to keep the JSON type prefixes on keys, for passing straight to to_bin
     :return: the GlobalModData represented by the file
     """
-    file = open(filepath, 'r')
-    gmd_dict: dict = json.load(file)
+    # read as bytes so the encoding is detected from the data (orjson writes UTF-8) rather than the system locale
+    file = open(filepath, 'rb')
+    data = file.read()
     file.close()
-    gmd = GlobalModData(gmd_dict[JSON_WORLD_VERSION_KEY])
+    gmd_dict: dict | None = None
+    if orjson is not None:
+        try:
+            gmd_dict = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # orjson rejects the Infinity and NaN the json module writes for non-finite numbers
+    if gmd_dict is None:
+        gmd_dict = json.loads(data)
+    gmd = GlobalModData(gmd_dict[JSON_WORLD_VERSION_KEY], json_keys)
     gmd_dict.pop(JSON_WORLD_VERSION_KEY)
-    gmd.tables = table_keys_from_json(gmd_dict)
+    gmd.tables = gmd_dict if json_keys else table_keys_from_json(gmd_dict)
     return gmd
 
 
-def to_json(filepath: str, gmd: GlobalModData):
+def to_json(filepath: str, gmd: GlobalModData, pretty: bool = True):
     """
     Writes GlobalModData as a readable/editable JSON file. Keys will be prefixed with their type to ensure they can be
-    converted back properly.
+    converted back properly. Unlike reading and writing binaries, JSON conversion is recursive, so tables nested more
+    than about 1000 levels deep can't be converted to or from JSON.
     :param filepath: The filepath to write to
     :param gmd: The GlobalModData to write
+    :param pretty: Whether to indent the JSON. Without orjson, indenting is much slower as the json module can only do
+    it in python
     :return:
     """
-    gmd_dict = table_keys_to_json(gmd.tables)
+    gmd_dict = dict(gmd.tables) if gmd.json_keys else table_keys_to_json(gmd.tables)
     gmd_dict[JSON_WORLD_VERSION_KEY] = gmd.world_version
 
-    file = open(filepath, 'w')
-    json.dump(gmd_dict, file, indent=4)
+    output = None
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            output = orjson.dumps(gmd_dict, option=option)
+        except orjson.JSONEncodeError:
+            pass  # e.g. tables nested deeper than orjson allows
+        # orjson writes non-finite numbers (e.g. math.huge) as null, which can't be converted back, the json module
+        # writes them as Infinity/NaN. tables never hold null, so only output containing it needs checking
+        if output is not None and b'null' in output and table_has_non_finite(gmd_dict):
+            output = None
+
+    if output is not None:
+        file = open(filepath, 'wb')
+        file.write(output)
+    else:
+        file = open(filepath, 'w', encoding='utf-8')
+        if pretty:
+            json.dump(gmd_dict, file, indent=4)
+        else:
+            json.dump(gmd_dict, file, separators=(',', ':'))
     file.close()
 
 
+def stream_json_to_bin(json_filepath: str) -> bytearray:
+    buffer = bytearray()
+    # the world version can come anywhere in the JSON, so it and the number of keys are filled in at the end
+    write_int(buffer, 0)
+    write_int(buffer, 0)
+    world_version = None
+    num_entries = 0
+    with open(json_filepath, 'rb') as file:
+        for table_name, table in ijson.kvitems(file, '', use_float=True):
+            if table_name == JSON_WORLD_VERSION_KEY:
+                world_version = table
+                continue
+            write_entry(buffer, table_name, table, json_keys=True)
+            num_entries += 1
+    if world_version is None:
+        raise Exception(f"JSON has no {JSON_WORLD_VERSION_KEY} key")
+    _INT.pack_into(buffer, 0, world_version)
+    _INT.pack_into(buffer, 4, num_entries)
+    return buffer
+
+
+def json_to_bin(json_filepath: str, bin_filepath: str):
+    """
+    Converts a JSON file to a global mod data binary. Large files are read one table at a time if ijson is installed,
+    so the whole JSON never has to be in memory, unless they contain non-finite numbers which ijson can't read.
+    :param json_filepath: Filepath of a JSON file
+    :param bin_filepath: The filepath to write to
+    :return:
+    """
+    buffer = None
+    if ijson is not None and os.path.getsize(json_filepath) >= JSON_STREAM_MIN_SIZE:
+        try:
+            buffer = stream_json_to_bin(json_filepath)
+        except ijson.JSONError:
+            pass  # ijson rejects the Infinity and NaN the json module writes for non-finite numbers
+    if buffer is None:
+        to_bin(bin_filepath, from_json(json_filepath, json_keys=True))
+        return
+
+    with open(bin_filepath, 'wb') as file:
+        file.write(buffer)
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("No filepath passed.")
-        exit(1)
-    in_filepath = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Converts Project Zomboid global mod data binaries to and from JSON.")
+    parser.add_argument('in_filepath', help="a .bin file to convert to JSON, or a .json file to convert to a binary")
+    parser.add_argument('out_filepath', nargs='?', help="where to write the output (default: out/global_mod_data)")
+    parser.add_argument('--compact', action='store_true',
+                        help="write JSON without indentation, which is smaller and faster to write")
+    parser.add_argument('--parallel', action='store_true',
+                        help="read the tables of a binary in parallel processes, can be faster for very large binaries "
+                             "with many tables on machines with several cores")
+    args = parser.parse_args()
+
+    in_filepath = args.in_filepath
     in_filepath = in_filepath.replace('\\', '/')
     extension = in_filepath.rsplit('/')[-1].rsplit('.', 1)[-1]
 
-    out_filepath = sys.argv[2] if len(sys.argv) > 2 else None
+    out_filepath = args.out_filepath
     if extension == 'bin':
-        gmd = from_bin(in_filepath)
+        gmd = from_bin(in_filepath, json_keys=True, parallel=args.parallel)
 
         if out_filepath is None:
             out_filepath = "out/global_mod_data.json"
         os.makedirs(out_filepath.rsplit('/')[0], exist_ok=True)
 
-        to_json(out_filepath, gmd)
+        to_json(out_filepath, gmd, pretty=not args.compact)
     elif extension == 'json':
-        gmd = from_json(in_filepath)
+        if args.compact:
+            parser.error("--compact only applies when converting a .bin file to JSON")
+        if args.parallel:
+            parser.error("--parallel only applies when converting a .bin file to JSON")
 
         if out_filepath is None:
             out_filepath = "out/global_mod_data.bin"
         os.makedirs(out_filepath.rsplit('/')[0], exist_ok=True)
 
-        to_bin(out_filepath, gmd)
+        json_to_bin(in_filepath, out_filepath)
     else:
         print("Invalid file extension. Pass a .bin file to convert to json, or pass a .json file to convert to bin.")
 
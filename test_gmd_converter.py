@@ -0,0 +1,241 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+
+import gmd_converter
+
+
+class RoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_non_finite_numbers(self):
+        gmd = gmd_converter.GlobalModData(195)
+        gmd.tables["numbers"] = {"max": float('inf'), "min": float('-inf'), "nan": float('nan'), "one": 1.0,
+                                 "nested": {1.0: float('inf')}}
+        gmd_converter.to_bin(self.path("in.bin"), gmd)
+
+        gmd_converter.to_json(self.path("out.json"), gmd_converter.from_bin(self.path("in.bin"), json_keys=True))
+        gmd_converter.json_to_bin(self.path("out.json"), self.path("out.bin"))
+        with open(self.path("in.bin"), 'rb') as original, open(self.path("out.bin"), 'rb') as converted:
+            self.assertEqual(original.read(), converted.read())
+
+        table = gmd_converter.from_json(self.path("out.json")).tables["numbers"]
+        self.assertEqual(table["max"], float('inf'))
+        self.assertEqual(table["min"], float('-inf'))
+        self.assertTrue(math.isnan(table["nan"]))
+        self.assertEqual(table["nested"], {1.0: float('inf')})
+
+    def test_non_ascii_strings(self):
+        gmd = gmd_converter.GlobalModData(195)
+        gmd.tables["tablé"] = {"ü": "héllo", "ключ": {"日本": "語 ✓"}, 1.0: "ä"}
+        gmd_converter.to_bin(self.path("in.bin"), gmd)
+        self.assertEqual(gmd_converter.from_bin(self.path("in.bin")).tables, gmd.tables)
+
+        gmd_converter.to_json(self.path("out.json"), gmd_converter.from_bin(self.path("in.bin"), json_keys=True))
+        self.assertEqual(gmd_converter.from_json(self.path("out.json")).tables, gmd.tables)
+        gmd_converter.json_to_bin(self.path("out.json"), self.path("out.bin"))
+        with open(self.path("in.bin"), 'rb') as original, open(self.path("out.bin"), 'rb') as converted:
+            self.assertEqual(original.read(), converted.read())
+
+    def test_deep_nesting(self):
+        gmd = gmd_converter.GlobalModData(195)
+        gmd.tables["deep"] = {}
+        current = gmd.tables["deep"]
+        for i in range(5000):
+            current[float(i)] = {}
+            current = current[float(i)]
+        current["end"] = True
+        gmd_converter.to_bin(self.path("in.bin"), gmd)
+
+        read = gmd_converter.from_bin(self.path("in.bin"))
+        current = read.tables["deep"]
+        for i in range(5000):
+            self.assertEqual(list(current), [float(i)])
+            current = current[float(i)]
+        self.assertEqual(current, {"end": True})
+
+    @unittest.skipIf(gmd_converter.ijson is None, "ijson is not installed")
+    def test_streamed(self):
+        gmd = gmd_converter.GlobalModData(195)
+        gmd.tables["first"] = {"a": 1.5, 2.0: {"b": True, "c": "ü"}, "array": {1.0: 2.0, 2.0: 3.0}}
+        gmd.tables["second"] = {}
+        gmd_converter.to_bin(self.path("in.bin"), gmd)
+        gmd_converter.to_json(self.path("in.json"), gmd)
+        with open(self.path("in.bin"), 'rb') as file:
+            expected = file.read()
+
+        self.assertEqual(gmd_converter.stream_json_to_bin(self.path("in.json")), expected)
+
+        min_size = gmd_converter.JSON_STREAM_MIN_SIZE
+        gmd_converter.JSON_STREAM_MIN_SIZE = 0
+        self.addCleanup(setattr, gmd_converter, 'JSON_STREAM_MIN_SIZE', min_size)
+        gmd_converter.json_to_bin(self.path("in.json"), self.path("out.bin"))
+        with open(self.path("out.bin"), 'rb') as file:
+            self.assertEqual(file.read(), expected)
+
+    @unittest.skipIf(gmd_converter.ijson is None, "ijson is not installed")
+    def test_streamed_non_finite_numbers(self):
+        gmd = gmd_converter.GlobalModData(195)
+        gmd.tables["numbers"] = {"max": float('inf'), "one": 1.0}
+        gmd_converter.to_json(self.path("in.json"), gmd)
+
+        min_size = gmd_converter.JSON_STREAM_MIN_SIZE
+        gmd_converter.JSON_STREAM_MIN_SIZE = 0
+        self.addCleanup(setattr, gmd_converter, 'JSON_STREAM_MIN_SIZE', min_size)
+        gmd_converter.json_to_bin(self.path("in.json"), self.path("out.bin"))
+        self.assertEqual(gmd_converter.from_bin(self.path("out.bin")).tables, gmd.tables)
+
+
+class ParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.filepath = os.path.join(self.directory.name, "in.bin")
+        self.gmd = gmd_converter.GlobalModData(195)
+        self.gmd.tables["first"] = {"a": 1.0, "b": {1.0: "c"}}
+        self.gmd.tables["second"] = {"d": True}
+        gmd_converter.to_bin(self.filepath, self.gmd)
+
+    def test_parallel_matches_serial(self):
+        self.assertEqual(gmd_converter.from_bin(self.filepath, parallel=True).tables, self.gmd.tables)
+
+    def test_wrong_entry_length(self):
+        del self.gmd.tables["second"]
+        gmd_converter.to_bin(self.filepath, self.gmd)
+        with open(self.filepath, 'r+b') as file:
+            # length of the only entry, after the world version and number of entries
+            file.seek(8)
+            length = int.from_bytes(file.read(4), 'big')
+            file.seek(8)
+            file.write((length + 1).to_bytes(4, 'big'))
+        for parallel in (False, True):
+            with self.subTest(parallel=parallel), self.assertRaisesRegex(Exception, "entry length"):
+                gmd_converter.from_bin(self.filepath, parallel=parallel)
+
+
+class DoubleArrayTest(unittest.TestCase):
+    @staticmethod
+    def write(table: dict) -> memoryview:
+        buffer = bytearray()
+        gmd_converter.python_write_table(buffer, table)
+        return memoryview(bytes(buffer))
+
+    def test_all_numbers(self):
+        table = {float(i + 1): i * 1.5 for i in range(50)}
+        data = self.write(table)
+        self.assertEqual(gmd_converter.read_double_array(data, 4, len(table)), (table, len(data)))
+
+        json_table, end = gmd_converter.read_double_array(data, 4, len(table), json_keys=True)
+        self.assertEqual(end, len(data))
+        self.assertEqual(json_table, {f"_number: {key}": value for key, value in table.items()})
+
+    def test_other_types_later(self):
+        for other in ("string", {2.0: 3.0}, True):
+            table = {float(i + 1): float(i) for i in range(20)}
+            table[21.0] = other
+            table[22.0] = 1.0
+            with self.subTest(other=other):
+                data = self.write(table)
+                self.assertIsNone(gmd_converter.read_double_array(data, 4, len(table)))
+                self.assertEqual(gmd_converter.python_read_table(data, 0), (table, len(data)))
+
+        table = {float(i + 1): float(i) for i in range(20)}
+        table["key"] = 1.0
+        data = self.write(table)
+        self.assertIsNone(gmd_converter.read_double_array(data, 4, len(table)))
+        self.assertEqual(gmd_converter.python_read_table(data, 0), (table, len(data)))
+
+    def test_truncated(self):
+        table = {float(i + 1): float(i) for i in range(10)}
+        data = self.write(table)
+        self.assertIsNone(gmd_converter.read_double_array(data[:-1], 4, len(table)))
+
+
+def random_table(rng: random.Random, depth: int = 0) -> dict:
+    table = {}
+    for i in range(rng.randint(0, 8)):
+        key = rng.choice([f"key{i}", f"ключ{i}", float(i), rng.uniform(-1e9, 1e9)])
+        kind = rng.random()
+        if kind < 0.2 and depth < 4:
+            table[key] = random_table(rng, depth + 1)
+        elif kind < 0.5:
+            table[key] = rng.uniform(-1e6, 1e6)
+        elif kind < 0.7:
+            table[key] = rng.random() < 0.5
+        else:
+            table[key] = "".join(rng.choice("abcü日 ") for _ in range(rng.randint(0, 20)))
+    if rng.random() < 0.2:
+        table["array"] = {float(i + 1): float(i) for i in range(rng.randint(1, 40))}
+    return table
+
+
+@unittest.skipIf(gmd_converter._gmd_fast is None, "_gmd_fast is not built")
+class CompiledTest(unittest.TestCase):
+    """Checks the compiled table functions agree with the python ones."""
+
+    def assert_same_write(self, table: dict, json_keys: bool = False) -> bytes:
+        python_buffer = bytearray()
+        gmd_converter.python_write_table(python_buffer, table, json_keys)
+        compiled_buffer = bytearray()
+        gmd_converter._gmd_fast.write_table(compiled_buffer, table, json_keys)
+        self.assertEqual(python_buffer, compiled_buffer)
+        return bytes(python_buffer)
+
+    def assert_same_read(self, data: bytes, json_keys: bool = False):
+        python_table, python_offset = gmd_converter.python_read_table(memoryview(data), 0, json_keys)
+        compiled_table, compiled_offset = gmd_converter._gmd_fast.read_table(memoryview(data), 0, json_keys)
+        self.assertEqual(python_offset, compiled_offset)
+        self.assertEqual(python_offset, len(data))
+        # compared by writing them again, as comparing very deep tables directly would hit the recursion limit
+        python_data = self.assert_same_write(python_table, json_keys)
+        self.assertEqual(python_data, self.assert_same_write(compiled_table, json_keys))
+
+    def test_random_tables(self):
+        rng = random.Random(0)
+        for i in range(200):
+            data = self.assert_same_write(random_table(rng))
+            self.assert_same_read(data)
+            self.assert_same_read(data, json_keys=True)
+
+    def test_deep_table(self):
+        table = {}
+        current = table
+        for i in range(3000):
+            current["child"] = {}
+            current = current["child"]
+        self.assert_same_read(self.assert_same_write(table))
+
+    def test_same_errors(self):
+        invalid = [
+            ({"long": "a" * 0x10000}, "String is too long to write"),
+            ({"a" * 0x10000: 1.0}, "String is too long to write"),
+            ({"int": 1}, "Cannot write table value of type"),
+            ({1: 1.0}, "Cannot write table key of type"),
+        ]
+        for table, message in invalid:
+            for write_table in (gmd_converter.python_write_table, gmd_converter._gmd_fast.write_table):
+                with self.subTest(message=message, write_table=write_table):
+                    with self.assertRaisesRegex(Exception, message):
+                        write_table(bytearray(), table)
+
+        invalid_data = [
+            (b"\0\0\0\1\5", "Invalid key type in table"),
+            (b"\0\0\0\1\0\0\1a\5", "Invalid value type"),
+            (b"\0\0\0\1\0\0\1a\3\2", "Bool value is neither true or false"),
+        ]
+        for data, message in invalid_data:
+            for read_table in (gmd_converter.python_read_table, gmd_converter._gmd_fast.read_table):
+                with self.subTest(data=data, read_table=read_table):
+                    with self.assertRaisesRegex(Exception, message):
+                        read_table(memoryview(data), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()